@@ -0,0 +1,370 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .dc import DC_KEYS, dc_bounds, g_preprocess
+
+
+class DistinctivenessIndex:
+
+    # Distinctiveness of a graph that changes over time. Degrees, weighted
+    # degrees and per-node sums are updated when arcs are added, removed or
+    # reweighted, with a cost proportional to the degree of their endpoints.
+    #
+    # The terms that depend on global quantities are factored out of the
+    # sums kept for each node. Since log10(n1 / g ** a) is equal to
+    # log10(n1) - a * log10(g) and log10(totalWEI / x) to
+    # log10(totalWEI) - log10(x):
+    #   D1 = log10(n1) * S - a * sum(w * log10(g))
+    #   D2 = log10(n1) * deg - a * sum(log10(g))
+    #   D3 = log10(totalWEI) * S - sum(w * log10(x))
+    # where S is the weighted degree of a node and g (or x) refer to its
+    # peers, so that n1 and totalWEI are only applied when scores are read.
+
+    def __init__(self, G=None, alpha=1, directed=False,
+                 measures=["D1", "D2", "D3", "D4", "D5"]):
+
+        if isinstance(alpha, list) and len(alpha) == 5:
+            alphalist = alpha
+        elif isinstance(alpha, (int, float)):
+            alphalist = [alpha] * 5
+        else:
+            raise ValueError(
+                "Error in the choice of alpha."
+                " Please specify a single number or a list of 5 values."
+            )
+
+        if any(a < 1 for a in alphalist):
+            print(
+                "WARNING. Alpha should be >= 1,"
+                " except you exactly know what you are doing."
+            )
+
+        self.alphalist = alphalist
+        self.measures = measures
+        self.directed = G.is_directed() if G is not None else directed
+        self.totalWEI = 0
+
+        # Each side lists, for a receiving node, the peers contributing to
+        # its scores and, for a peer, the nodes receiving its contributions:
+        # (suffix, peers, receivers, weighted degree of the peer by alpha)
+        if not self.directed:
+            self.adj = {}
+            self.sides = [("", self.adj, self.adj, {2: {}, 3: {}})]
+        else:
+            self.succ = {}
+            self.pred = {}
+            self.sides = [
+                ("_in", self.pred, self.succ, {2: {}, 3: {}}),
+                ("_out", self.succ, self.pred, {2: {}, 3: {}}),
+            ]
+        self.sums = {suffix: {} for suffix, _, _, _ in self.sides}
+
+        if G is not None:
+            prep = g_preprocess(G, alpha=alphalist, measures=measures,
+                                copy=False)
+            if isinstance(prep, float):
+                raise ValueError("The graph could not be preprocessed.")
+            for node in prep.nodes:
+                self.add_node(node)
+            for u, v, w in zip(prep.src.tolist(), prep.dst.tolist(),
+                               prep.wei.tolist()):
+                self._arcs(prep.nodes[u], prep.nodes[v], w)
+            self.recompute()
+
+    def _arcs(self, u, v, w):
+
+        # Sets (or removes, if w is None) the arc between u and v
+        if not self.directed:
+            pairs = [(self.adj, u, v), (self.adj, v, u)]
+        else:
+            pairs = [(self.succ, u, v), (self.pred, v, u)]
+        for adjacency, a, b in pairs:
+            if w is None:
+                del adjacency[a][b]
+            else:
+                adjacency[a][b] = w
+
+    def _terms(self, receivers, weisum, peer, w):
+
+        # Terms that peer adds to the sums of a node receiving an arc of
+        # weight w from it
+        alphalist = self.alphalist
+        deg = len(receivers[peer])
+        terms = {"S": w}
+        if "D1" in self.measures:
+            terms["D1"] = w * math.log10(deg)
+        if "D2" in self.measures:
+            terms["D2"] = math.log10(deg)
+        if "D3" in self.measures:
+            terms["D3"] = w * math.log10(
+                weisum[2][peer] - w ** alphalist[2] + 1)
+        if "D4" in self.measures:
+            terms["D4"] = w * (w ** alphalist[3] / weisum[3][peer])
+        if "D5" in self.measures:
+            terms["D5"] = 1 / deg ** alphalist[4]
+        return terms
+
+    def _contribute(self, side, peer, sign):
+
+        # Adds (sign=1) or subtracts (sign=-1) the terms of peer to the
+        # sums of all the nodes receiving its contributions
+        suffix, _, receivers, weisum = side
+        sums = self.sums[suffix]
+        for node, w in receivers[peer].items():
+            for k, t in self._terms(receivers, weisum, peer, w).items():
+                sums[k][node] += sign * t
+
+    def _weisum(self, side, peer):
+
+        # Weighted degree of peer (by the alpha of D3 and D4), on the side
+        # of the arcs reaching the nodes it contributes to
+        _, _, receivers, weisum = side
+        for i in [2, 3]:
+            weisum[i][peer] = sum(w ** self.alphalist[i]
+                                  for w in receivers[peer].values())
+
+    def add_node(self, node):
+
+        if not self.directed:
+            if node in self.adj:
+                return
+            self.adj[node] = {}
+        else:
+            if node in self.succ:
+                return
+            self.succ[node] = {}
+            self.pred[node] = {}
+        for suffix, _, _, weisum in self.sides:
+            for i in [2, 3]:
+                weisum[i][node] = 0
+        for sums in self.sums.values():
+            for k in ["S", "D1", "D2", "D3", "D4", "D5"]:
+                sums.setdefault(k, {})[node] = 0
+
+    def remove_node(self, node):
+
+        # Removes a node and all its arcs
+        if not self.directed:
+            if node not in self.adj:
+                return
+            for v in list(self.adj[node]):
+                self._update(node, v, None)
+            del self.adj[node]
+        else:
+            if node not in self.succ:
+                return
+            for v in list(self.succ[node]):
+                self._update(node, v, None)
+            for u in list(self.pred[node]):
+                self._update(u, node, None)
+            del self.succ[node]
+            del self.pred[node]
+        for _, _, _, weisum in self.sides:
+            for i in [2, 3]:
+                del weisum[i][node]
+        for sums in self.sums.values():
+            for values in sums.values():
+                del values[node]
+
+    def _update(self, u, v, w):
+
+        # Changes the weight of the arc (u, v) to w (None removes it). The
+        # peers whose degree and weighted degree change are u and v for
+        # undirected graphs, u (as a source) and v (as a target) for
+        # directed ones: their contributions to all the nodes they reach
+        # are removed, the arc is updated, and contributions added back.
+        if u == v:
+            # Loops are ignored
+            return
+
+        if not self.directed:
+            affected = [(self.sides[0], u), (self.sides[0], v)]
+            old = self.adj.get(u, {}).get(v)
+        else:
+            affected = [(self.sides[0], u), (self.sides[1], v)]
+            old = self.succ.get(u, {}).get(v)
+        if old is None and w is None:
+            # Removing a missing arc leaves the graph unchanged
+            return
+        self.add_node(u)
+        self.add_node(v)
+
+        for side, peer in affected:
+            self._contribute(side, peer, -1)
+
+        self._arcs(u, v, w)
+        self.totalWEI += (w or 0) - (old or 0)
+        for side, peer in affected:
+            self._weisum(side, peer)
+
+        for side, peer in affected:
+            self._contribute(side, peer, 1)
+
+    def add_edge(self, u, v, weight=1):
+
+        # Arcs added more than once are merged by summing their weights,
+        # as done for MultiGraph and MultiDiGraph
+        if not self.directed:
+            old = self.adj.get(u, {}).get(v, 0)
+        else:
+            old = self.succ.get(u, {}).get(v, 0)
+        self._update(u, v, old + weight)
+
+    def degree(self, node):
+
+        if not self.directed:
+            return len(self.adj.get(node, {}))
+        return len(self.succ.get(node, {})) + len(self.pred.get(node, {}))
+
+    def remove_edge(self, u, v):
+
+        self._update(u, v, None)
+
+    def update_weight(self, u, v, weight):
+
+        self._update(u, v, weight)
+
+    def recompute(self):
+
+        # Recomputes all sums from scratch (e.g. to discard the rounding
+        # errors accumulated over many updates)
+        self.totalWEI = sum(w for receivers in self.sides[0][2].values()
+                            for w in receivers.values())
+        if not self.directed:
+            # Undirected arcs are listed for both endpoints
+            self.totalWEI /= 2
+        for sums in self.sums.values():
+            for values in sums.values():
+                for node in values:
+                    values[node] = 0
+        for side in self.sides:
+            for peer in side[2]:
+                self._weisum(side, peer)
+        for side in self.sides:
+            for peer in side[2]:
+                self._contribute(side, peer, 1)
+
+    def scores(self, normalize=False):
+
+        nodes = list(self.sides[0][1])
+        n1 = len(nodes) - 1
+        if n1 < 2:
+            print("Graph must have at least 3 nodes.")
+            return np.nan
+
+        alphalist = self.alphalist
+        if any(a < 1 for a in alphalist):
+            normalize = False
+
+        if normalize is True:
+            weights = [w for receivers in self.sides[0][2].values()
+                       for w in receivers.values()]
+            if weights:
+                bounds = dc_bounds(self.directed, n1, alphalist, max(weights),
+                                   min(weights), self.measures)
+            else:
+                normalize = False
+
+        DC = {}
+        for suffix, peers, _, _ in self.sides:
+            sums = self.sums[suffix]
+            for m in self.measures:
+                if m == "D1":
+                    values = {
+                        x: np.log10(n1) * sums["S"][x]
+                        - alphalist[0] * sums["D1"][x] for x in nodes}
+                elif m == "D2":
+                    values = {
+                        x: np.log10(n1) * len(peers[x])
+                        - alphalist[1] * sums["D2"][x] for x in nodes}
+                elif m == "D3":
+                    if self.totalWEI > 0:
+                        logtotal = np.log10(self.totalWEI)
+                    else:
+                        logtotal = 0
+                    values = {
+                        x: logtotal * sums["S"][x] - sums["D3"][x]
+                        for x in nodes}
+                else:
+                    values = dict(sums[m])
+                if normalize is True:
+                    Dmin, Dmax = bounds[m]
+                    values = {x: (v - Dmin) / (Dmax - Dmin)
+                              for x, v in values.items()}
+                DC[m + suffix] = values
+
+        return {k: DC[k] for k in DC_KEYS if k in DC}
+
+
+def distinctiveness_windows(edges, window, step, start=None, alpha=1,
+                            directed=False, normalize=False,
+                            measures=["D1", "D2", "D3", "D4", "D5"],
+                            source="source", target="target", time="time",
+                            edge_attr="weight"):
+
+    # Distinctiveness of the graphs of a stream of timestamped edges
+    # (sorted by time) in sliding windows: the snapshot ending at time
+    # "end" includes the edges with end - window <= time < end. Snapshots
+    # end at start + window, start + window + step, ... up to the first
+    # one including the last edge. Edges are added to and removed from a
+    # DistinctivenessIndex as they enter and leave the window, multiple
+    # edges between the same nodes are merged by summing their weights
+    # (as for MultiGraph and MultiDiGraph) and nodes without edges in the
+    # window are removed.
+    if isinstance(edges, pd.DataFrame):
+        columns = [source, target, time]
+        if edge_attr in edges.columns:
+            columns.append(edge_attr)
+        edges = edges[columns].itertuples(index=False, name=None)
+
+    index = DistinctivenessIndex(alpha=alpha, directed=directed,
+                                 measures=measures)
+    # Number of edges and merged weight of each arc in the window
+    merged = {}
+    active = deque()
+
+    def key(u, v):
+        return (u, v) if directed else frozenset([u, v])
+
+    def expire(end):
+        while active and active[0][2] < end - window:
+            u, v, _, w = active.popleft()
+            arc = merged[key(u, v)]
+            arc[0] -= 1
+            arc[1] -= w
+            if arc[0] == 0:
+                del merged[key(u, v)]
+                index.remove_edge(u, v)
+                for x in [u, v]:
+                    if index.degree(x) == 0:
+                        index.remove_node(x)
+            else:
+                index.update_weight(u, v, arc[1])
+
+    end = None
+    for edge in edges:
+        u, v, t = edge[:3]
+        w = edge[3] if len(edge) > 3 else 1
+        if w is None or w != w:
+            w = 1
+        if end is None:
+            end = (t if start is None else start) + window
+        while t >= end:
+            expire(end)
+            yield end, index.scores(normalize)
+            end = end + step
+        if u == v:
+            # Loops are ignored
+            continue
+        arc = merged.setdefault(key(u, v), [0, 0])
+        arc[0] += 1
+        arc[1] += w
+        index.update_weight(u, v, arc[1])
+        active.append((u, v, t, w))
+
+    if end is not None:
+        expire(end)
+        yield end, index.scores(normalize)
@@ -0,0 +1,54 @@
+import math
+
+try:
+    import numba
+    from numba import prange
+except ImportError:
+    numba = None
+    prange = range
+
+# Kernel compiled by Numba on first use
+compiled_kernel = None
+
+
+def dc_kernel(indptr, peers, wei, t1, t2, t5, weisum3, weisum4, a3, a4,
+              totalWEI, flags, groups, out):
+
+    # Sums the contributions of the peers of each node, listed in CSR
+    # format (peers[indptr[x]:indptr[x + 1]] for node x), in a single loop
+    # computing all selected metrics (flags) at once. Nodes are processed
+    # in parallel: each one only writes its own row of out, which has
+    # shape (nodes x groups x 5 metrics). t1, t2 and t5 are the terms of
+    # D1, D2 and D5 of each peer, weisum3 and weisum4 its weighted degree
+    # for D3 and D4.
+    n = len(indptr) - 1
+    for x in prange(n):
+        for j in range(indptr[x], indptr[x + 1]):
+            y = peers[j]
+            w = wei[j]
+            g = groups[y]
+            if flags[0]:
+                out[x, g, 0] += w * t1[y]
+            if flags[1]:
+                out[x, g, 1] += t2[y]
+            if flags[2]:
+                out[x, g, 2] += w * math.log10(
+                    totalWEI / (weisum3[y] - w ** a3 + 1))
+            if flags[3]:
+                out[x, g, 3] += w * (w ** a4 / weisum4[y])
+            if flags[4]:
+                out[x, g, 4] += t5[y]
+
+
+def get_kernel(compiled=True):
+
+    # dc_kernel compiled by Numba, None if Numba is not installed. With
+    # compiled=False the Python function is returned (for testing).
+    global compiled_kernel
+    if not compiled:
+        return dc_kernel
+    if numba is None:
+        return None
+    if compiled_kernel is None:
+        compiled_kernel = numba.njit(parallel=True)(dc_kernel)
+    return compiled_kernel
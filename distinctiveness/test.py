@@ -1,6 +1,24 @@
+import os
+import tempfile
+
 import networkx as nx
+import numpy as np
+import pandas as pd
 from networkx.testing import almost_equal
-from distinctiveness.dc import distinctiveness
+from distinctiveness.dc import (clear_cache, dc_edgeattribute,
+                                dc_nodeattribute, dc_numba, dc_vectorized,
+                                disable_cache,
+                                distinctiveness, distinctiveness_approx,
+                                distinctiveness_byattribute,
+                                distinctiveness_from_edges,
+                                distinctiveness_from_file,
+                                distinctiveness_many,
+                                distinctiveness_sweep, enable_cache,
+                                g_preprocess, load_graph, profile_stages,
+                                save_graph, top_k, weiinoutsumalpha,
+                                weisumalpha)
+from distinctiveness.incremental import (DistinctivenessIndex,
+                                         distinctiveness_windows)
 
 
 def small_undir_G():
@@ -90,8 +108,526 @@ class TestDistinctiveness:
         assert almost_equal(round(DC2dir["D5_in"]["D"], 3), 1.062)
         assert almost_equal(round(DC2dir["D5_out"]["D"], 3), 0.250)
 
+    def test_vectorized(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            for alpha in [1, 2, [1, 2, 3, 1, 2]]:
+                for normalize in [False, True]:
+                    DCloop = distinctiveness(G, normalize=normalize,
+                                             alpha=alpha, engine="loop")
+                    DCvect = distinctiveness(G, normalize=normalize,
+                                             alpha=alpha, engine="vectorized")
+                    DCpy = distinctiveness(G, normalize=normalize,
+                                           alpha=alpha, engine="python")
+                    assert DCloop.keys() == DCvect.keys() == DCpy.keys()
+                    for k in DCloop:
+                        for n in G.nodes:
+                            assert almost_equal(DCloop[k][n], DCvect[k][n])
+                            assert almost_equal(DCloop[k][n], DCpy[k][n])
+                            if not normalize:
+                                assert type(DCpy[k][n]) is float
+
+    def test_from_edges(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            directed = G.is_directed()
+            DC = distinctiveness(G, alpha=2)
+
+            edges = pd.DataFrame(
+                [(u, v, w) for u, v, w in G.edges(data="weight")],
+                columns=["source", "target", "weight"])
+            DCdf = distinctiveness_from_edges(edges, directed=directed,
+                                              alpha=2)
+
+            # Integer ids, with the arc A-E (nodes 0 and 1) split in two
+            # parallel arcs and an additional loop
+            nodes = list(G.nodes)
+            src = [nodes.index(u) for u in edges["source"]] + [0, 1]
+            dst = [nodes.index(v) for v in edges["target"]] + [1, 1]
+            wei = list(edges["weight"])
+            wei[0] -= 1
+            wei += [1, 3]
+            DCarr = distinctiveness_from_edges(
+                np.array(src), np.array(dst), np.array(wei, dtype=float),
+                n_nodes=len(nodes), directed=directed, alpha=2)
+
+            # Arcs with missing endpoints are dropped
+            extra = pd.DataFrame([("A", None, 1.0), (None, "B", 2.0)],
+                                 columns=["source", "target", "weight"])
+            DCmissing = distinctiveness_from_edges(
+                pd.concat([edges, extra]), directed=directed, alpha=2)
+            ids = np.array(list(range(len(nodes))) + [np.nan])
+            assert DCmissing == DCdf
+            assert isinstance(distinctiveness_from_edges(
+                ids, ids[::-1], directed=directed), dict)
+
+            assert DC.keys() == DCdf.keys() == DCarr.keys()
+            for k in DC:
+                for i, n in enumerate(nodes):
+                    assert almost_equal(DC[k][n], DCdf[k][n])
+                    assert almost_equal(DC[k][n], DCarr[k][i])
+
+            # Sparse adjacency matrices, also with each undirected edge
+            # listed once (requires SciPy)
+            try:
+                import scipy.sparse as sp
+            except ImportError:
+                continue
+            A = nx.to_scipy_sparse_array(G, nodelist=nodes)
+            matrices = [A] if directed else [A, sp.tril(A), sp.triu(A)]
+            for M in matrices:
+                DCsp = distinctiveness_from_edges(M, directed=directed,
+                                                  alpha=2)
+                for k in DC:
+                    for i, n in enumerate(nodes):
+                        assert almost_equal(DC[k][n], DCsp[k][i])
+
+    def test_preprocess(self):
+        G = small_undir_G()
+        G.add_edge("A", "A", weight=3)
+        G.add_edge("E", "F")
+        prep = g_preprocess(G, alpha=[1, 1, 2, 1, 1])
+        assert G.has_edge("A", "A")
+        assert not prep.G.has_edge("A", "A")
+        assert prep.G["E"]["F"]["weight"] == 1
+        assert prep.n1 == 5
+        assert prep.totalWEI == 22
+        assert prep.maxwij == 5
+        assert prep.minwij == 1
+        B = prep.nodes.index("B")
+        assert prep.deg[B] == 4
+        assert prep.wei_sum_alpha_list[2][B] == 37
+        assert prep.wei_sum_alpha_list[3][B] == 11
+
+    def test_preprocess_nocopy(self):
+        G = nx.MultiDiGraph(small_dir_G())
+        G.add_edge("A", "E", weight=2)
+        G.add_edge("C", "C", weight=3)
+        G.add_edge("E", "F")
+        prepcopy = g_preprocess(G, alpha=2)
+        prep = g_preprocess(G, alpha=2, copy=False)
+        assert prep.G is G
+        assert G.number_of_edges() == 11
+        assert "weight" not in G["E"]["F"][0]
+        assert prep.nodes == prepcopy.nodes
+        for x in ["indeg", "outdeg", "totalWEI", "maxwij", "minwij"]:
+            assert np.all(getattr(prep, x) == getattr(prepcopy, x))
+        for i in [2, 3]:
+            assert np.allclose(prep.wei_insum_alpha_list[i],
+                               prepcopy.wei_insum_alpha_list[i])
+            assert np.allclose(prep.wei_outsum_alpha_list[i],
+                               prepcopy.wei_outsum_alpha_list[i])
+
+    def test_parallel(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            for engine in ["loop", "vectorized"]:
+                DC = distinctiveness(G, alpha=[1, 2, 3, 1, 2], normalize=True,
+                                     engine=engine)
+                DCpar = distinctiveness(G, alpha=[1, 2, 3, 1, 2],
+                                        normalize=True, engine=engine,
+                                        n_jobs=2)
+                assert DC.keys() == DCpar.keys()
+                for k in DC:
+                    for n in G.nodes:
+                        assert almost_equal(DC[k][n], DCpar[k][n])
+
+    def test_sweep(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            DCsweep = distinctiveness_sweep(G, alphas=[1, 2, 3.5],
+                                            normalize=True)
+            assert DCsweep.index.names == ["alpha", "node"]
+            for alpha in [1, 2, 3.5]:
+                DC = distinctiveness(G, alpha=alpha, normalize=True)
+                assert list(DC.keys()) == list(DCsweep.columns)
+                for k in DC:
+                    for n in G.nodes:
+                        assert almost_equal(DC[k][n],
+                                            DCsweep.loc[(alpha, n), k])
+
+    def test_nodeattribute(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            for n in G.nodes:
+                G.nodes[n]["group"] = "x" if n in ["A", "C", "F"] else "y"
+            DCall = dc_nodeattribute(G, "group", alpha=[1, 2, 3, 1, 2])
+            assert len(DCall.columns) == (20 if G.is_directed() else 10)
+            DCx = distinctiveness_byattribute(G, "group", "x",
+                                              alpha=[1, 2, 3, 1, 2])
+            DCy = distinctiveness_byattribute(G, "group", "y",
+                                              alpha=[1, 2, 3, 1, 2])
+            # Contributions of the two groups add up to the whole metric
+            DC = distinctiveness(G, alpha=[1, 2, 3, 1, 2])
+            for k in DC:
+                for n in G.nodes:
+                    assert almost_equal(DCx[k][n], DCall.loc[n, k + "_x"])
+                    assert almost_equal(DCy[k][n], DCall.loc[n, k + "_y"])
+                    assert almost_equal(DCx[k][n] + DCy[k][n], DC[k][n])
+
+    def test_edgeattribute(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            for u, v, data in G.edges(data=True):
+                data["type"] = "work" if data["weight"] > 2 else "family"
+            DCall = dc_edgeattribute(G, "type", alpha=[1, 2, 3, 1, 2])
+            for attval in ["work", "family"]:
+                G1 = G.copy()
+                G1.remove_edges_from([(u, v) for u, v, t
+                                      in G.edges(data="type") if t != attval])
+                DC = distinctiveness(G1, alpha=[1, 2, 3, 1, 2])
+                for k in DC:
+                    for n in G.nodes:
+                        assert almost_equal(DC[k][n],
+                                            DCall.loc[n, k + "_" + attval])
+
+    def test_incremental(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            index = DistinctivenessIndex(G, alpha=[1, 2, 3, 1, 2])
+            index.add_edge("A", "E", 2)
+            index.add_edge("E", "G", 3)
+            index.remove_edge("B", "C")
+            index.update_weight("B", "F", 1)
+            G["A"]["E"]["weight"] += 2
+            G.add_edge("E", "G", weight=3)
+            G.remove_edge("B", "C")
+            G["B"]["F"]["weight"] = 1
+            # Missing arcs are not added by trying to remove them
+            index.remove_edge("X", "Y")
+            index.remove_edge("A", "Y")
+            DC = distinctiveness(G, alpha=[1, 2, 3, 1, 2], normalize=True)
+            DCindex = index.scores(normalize=True)
+            assert DC.keys() == DCindex.keys()
+            for k in DC:
+                assert DCindex[k].keys() == DC[k].keys()
+                for n in G.nodes:
+                    assert almost_equal(DC[k][n], DCindex[k][n])
+
+    def test_top_k(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            DC = distinctiveness(G, alpha=2, normalize=True)
+            top = top_k(G, 3, measure=list(DC), alpha=2, normalize=True)
+            for k in DC:
+                ranking = sorted(DC[k].items(), key=lambda x: -x[1])
+                assert len(top[k]) == 3
+                for (n, score), (n1, score1) in zip(top[k], ranking):
+                    assert almost_equal(score, score1)
+                    assert almost_equal(score, DC[k][n])
+        assert np.isnan(top_k(small_undir_G(), 3, measure="D1_in"))
+        for k in [0, -1, 1.5]:
+            assert np.isnan(top_k(small_undir_G(), k))
+
+        # Ties at the cutoff are broken by node order
+        G = nx.random_regular_graph(4, 2000, seed=0)
+        top = top_k(G, 50, measure="D2")
+        assert [n for n, _ in top] == list(G.nodes)[:50]
+
+    def test_approx(self):
+        G = nx.gnm_random_graph(200, 2000, seed=1)
+        for u, v, data in G.edges(data=True):
+            data["weight"] = (u + v) % 5 + 1
+        M = nx.MultiDiGraph(small_dir_G())
+        M.add_edge("A", "B", weight=2)
+        M.add_edge("C", "C")
+        for H in [G, G.to_directed(), small_dir_G(), M, nx.MultiGraph(M)]:
+            DC = distinctiveness(H, alpha=2, normalize=True)
+            res = distinctiveness_approx(H, alpha=2, normalize=True,
+                                         sample=1)
+            for k in DC:
+                for n in DC[k]:
+                    assert almost_equal(res.estimate[k][n], DC[k][n])
+                    assert almost_equal(res.lower[k][n], DC[k][n])
+                    assert almost_equal(res.upper[k][n], DC[k][n])
+        DC = distinctiveness(G, alpha=2, output="array")
+        res = distinctiveness_approx(G, alpha=2, sample=0.5, seed=0,
+                                     output="array")
+        covered = (res.lower.values <= DC.values) & (
+            DC.values <= res.upper.values)
+        assert covered.mean() > 0.8
+        assert np.isnan(distinctiveness_approx(G, sample=0))
+
+    def test_output(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            DC = distinctiveness(G, alpha=2, normalize=True)
+            for engine in ["loop", "vectorized"]:
+                res = distinctiveness(G, alpha=2, normalize=True,
+                                      engine=engine, output="array")
+                df = distinctiveness(G, alpha=2, normalize=True,
+                                     engine=engine, output="dataframe")
+                assert res.keys == list(DC) and list(df.columns) == res.keys
+                for j, k in enumerate(res.keys):
+                    for i, n in enumerate(res.nodes):
+                        assert almost_equal(res.values[i, j], DC[k][n])
+                        assert almost_equal(df.loc[n, k], DC[k][n])
+            df = pd.DataFrame(res.values, index=res.nodes, columns=res.keys,
+                              copy=False)
+            assert np.shares_memory(df.to_numpy(), res.values)
+
+    def test_lazy(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            for engine in ["loop", "vectorized"]:
+                DC = distinctiveness(G, alpha=[1, 2, 3, 3, 2],
+                                     normalize=True, engine=engine)
+                lazy = distinctiveness(G, alpha=[1, 2, 3, 3, 2],
+                                       normalize=True, engine=engine,
+                                       output="lazy")
+                assert list(lazy) == list(DC) and not lazy.computed
+                k = list(DC)[-1]
+                assert lazy[k] == DC[k]
+                assert all(x[:2] == k[:2] for x in lazy.computed)
+                for k in DC:
+                    for n in DC[k]:
+                        assert almost_equal(lazy[k][n], DC[k][n])
+
+    def test_from_file(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            DC = distinctiveness(G, alpha=2, normalize=True)
+
+            # The arc A-E split in two parallel arcs, plus a loop
+            edges = pd.DataFrame(
+                [(u, v, w) for u, v, w in G.edges(data="weight")]
+                + [("A", "E", 1), ("C", "C", 3)],
+                columns=["source", "target", "weight"])
+            edges.loc[0, "weight"] -= 1
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "edges.tsv")
+                edges.to_csv(path, sep="\t", index=False)
+                DCfile = distinctiveness_from_file(
+                    path, directed=G.is_directed(), alpha=2, normalize=True,
+                    chunksize=3, buckets=4)
+            for k in DC:
+                for n in DC[k]:
+                    assert almost_equal(DC[k][n], DCfile[k][n])
+
+        # Labels are strings in all chunks, even if some look like numbers
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "edges.csv")
+            pd.DataFrame([(5, 6, 1), (6, 7, 1), ("5", "x", 0.5),
+                          ("x", 7, 1)],
+                         columns=["source", "target", "weight"]).to_csv(
+                             path, index=False)
+            DCfile = distinctiveness_from_file(path, measures=["D1"],
+                                               chunksize=2)
+        assert list(DCfile["D1"]) == ["5", "6", "7", "x"]
+
+        # Rows without a source or a target are dropped
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "edges.csv")
+            with open(path, "w") as f:
+                f.write("source,target\na,b\nb,c\nc,\nd,a\n")
+            DCfile = distinctiveness_from_file(path, measures=["D2"],
+                                               chunksize=3)
+        H = nx.Graph([("a", "b"), ("b", "c"), ("d", "a")])
+        DC = distinctiveness(H, measures=["D2"])
+        for n in H:
+            assert almost_equal(DC["D2"][n], DCfile["D2"][n])
+
+    def test_save_load(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            with tempfile.TemporaryDirectory() as tmp:
+                save_graph(G, tmp)
+                S = load_graph(tmp)
+                assert S.nodes == list(G.nodes)
+                assert isinstance(S.wei, np.memmap)
+                for engine in ["loop", "vectorized"]:
+                    DC = distinctiveness(G, alpha=2, normalize=True,
+                                         engine=engine)
+                    DCS = distinctiveness(S, alpha=2, normalize=True,
+                                          engine=engine)
+                    for k in DC:
+                        for n in DC[k]:
+                            assert almost_equal(DC[k][n], DCS[k][n])
+                del S
+
+    def test_cache(self):
+        G = small_dir_G()
+        DC = distinctiveness(G, alpha=2)
+        DC3 = distinctiveness(G, alpha=3, measures=["D3"])
+        enable_cache(2)
+        try:
+            prep = g_preprocess(G, alpha=2, copy=False)
+            assert g_preprocess(G, alpha=2, copy=False) is prep
+            # The cache does not keep graphs alive
+            assert prep.G is None
+            assert g_preprocess(G, alpha=1, measures=["D2"],
+                                copy=False) is prep
+            assert g_preprocess(G, alpha=3, copy=False) is not prep
+            assert distinctiveness(G, alpha=2) == DC
+            assert distinctiveness(G, alpha=3, measures=["D3"]) == DC3
+
+            # Graphs with a cache_key are not read again until the key
+            # is cleared
+            G.graph["cache_key"] = "G"
+            assert distinctiveness(G, alpha=2) == DC
+            G["A"]["E"]["weight"] = 1
+            assert distinctiveness(G, alpha=2) == DC
+            clear_cache("G")
+            assert distinctiveness(G, alpha=2) != DC
+        finally:
+            disable_cache()
+
+    def test_alpha_sums(self):
+        G = small_undir_G()
+        prep = g_preprocess(G, alpha=[1, 1, 2, 2, 1], copy=False)
+        assert prep.wei_sum_alpha_list[2] is prep.wei_sum_alpha_list[3]
+        sums = weisumalpha(G, 2)
+        for node, x in zip(prep.nodes, prep.wei_sum_alpha_list[2]):
+            assert almost_equal(sums[node],
+                                sum(w ** 2 for _, _, w in
+                                    G.edges(node, data="weight")))
+            assert almost_equal(sums[node], x)
+        G = small_dir_G()
+        prep = g_preprocess(G, alpha=3, copy=False)
+        insums, outsums = weiinoutsumalpha(G, 3)
+        for i, node in enumerate(prep.nodes):
+            assert almost_equal(insums[node],
+                                prep.wei_insum_alpha_list[2][i])
+            assert almost_equal(outsums[node],
+                                prep.wei_outsum_alpha_list[2][i])
+
+        # Parallel edges of multigraphs are counted one by one
+        M = nx.MultiGraph()
+        M.add_edges_from([(0, 1, {"weight": 2}), (0, 1, {"weight": 3}),
+                          (1, 2, {"weight": 1})])
+        assert weisumalpha(M, 2) == {0: 13, 1: 14, 2: 1}
+        assert weisumalpha(M, 1) == {0: 5, 1: 6, 2: 1}
+        D = nx.MultiDiGraph(M.edges(data=True))
+        assert weiinoutsumalpha(D, 2) == ({0: 0, 1: 13, 2: 1},
+                                          {0: 13, 1: 1, 2: 0})
+        assert weiinoutsumalpha(D, 1) == ({0: 0, 1: 5, 2: 1},
+                                          {0: 5, 1: 1, 2: 0})
+
+        # Weighted degrees of alphas already used are taken from the cache
+        DC = distinctiveness(G, alpha=[1, 1, 3, 2, 1])
+        enable_cache()
+        try:
+            g_preprocess(G, alpha=[1, 1, 2, 3, 1], copy=False)
+            prep = g_preprocess(G, alpha=[1, 1, 3, 2, 1], copy=False)
+            cached = g_preprocess(G, alpha=[1, 1, 2, 3, 1], copy=False)
+            assert (prep.wei_insum_alpha_list[2]
+                    is cached.wei_insum_alpha_list[3])
+            assert distinctiveness(G, alpha=[1, 1, 3, 2, 1]) == DC
+        finally:
+            disable_cache()
+
+    def test_profile_stages(self):
+        G = nx.MultiDiGraph(small_dir_G())
+        received = []
+        with profile_stages(received.append, memory=True) as records:
+            DC = distinctiveness(G, alpha=2, normalize=True,
+                                 engine="vectorized")
+        assert records == received
+        stages = [r["stage"] for r in records]
+        assert stages == [
+            "g_preprocess.arcs", "g_preprocess.merge",
+            "g_preprocess.validation", "arcs_preprocess.degrees",
+            "arcs_preprocess.alpha_sums", "arcs_preprocess.weight_stats",
+            "distinctiveness.metrics", "distinctiveness.normalization",
+            "distinctiveness.output"]
+        assert records[0]["edges"] == G.number_of_edges()
+        assert all(r["seconds"] >= 0 for r in records)
+        assert all(r["memory"] is not None for r in records)
+
+        # Nothing is recorded outside the block
+        assert distinctiveness(G, alpha=2, normalize=True,
+                               engine="vectorized") == DC
+        assert len(received) == len(stages)
+
+    def test_numba(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            for n in G.nodes:
+                G.nodes[n]["group"] = "x" if n in ["A", "C", "F"] else "y"
+            alpha = [1, 2, 3, 1, 2]
+            DC = distinctiveness(G, alpha=alpha, normalize=True)
+            DCnumba = distinctiveness(G, alpha=alpha, normalize=True,
+                                      engine="numba")
+            DCx = distinctiveness_byattribute(G, "group", "x", alpha=alpha)
+            DCxnumba = distinctiveness_byattribute(G, "group", "x",
+                                                   alpha=alpha,
+                                                   engine="numba")
+            for k in DC:
+                for n in G.nodes:
+                    assert almost_equal(DC[k][n], DCnumba[k][n])
+                    assert almost_equal(DCx[k][n], DCxnumba[k][n])
+
+            # The kernel, also when Numba is not installed
+            prep = g_preprocess(G, alpha=alpha, copy=False)
+            groups = np.arange(len(prep.nodes)) % 3
+            for g, ng in [(None, None), (groups, 3)]:
+                DCvect = dc_vectorized(prep, alpha, groups=g, ngroups=ng)
+                DCkernel = dc_numba(prep, alpha, groups=g, ngroups=ng,
+                                    compiled=False)
+                for k in DCvect:
+                    assert np.allclose(DCvect[k], DCkernel[k])
+
+    def test_many(self):
+        graphs = [small_undir_G(), small_dir_G(), nx.path_graph(2),
+                  nx.MultiGraph(small_undir_G())]
+        graphs[3].add_edge("A", "E", weight=1)
+        edges = (np.array([0, 1, 2]), np.array([1, 2, 3]))
+        DCs = [distinctiveness(G, alpha=2, normalize=True) for G in graphs]
+        DCs.append(distinctiveness_from_edges(*edges, alpha=2,
+                                              normalize=True))
+        for n_jobs, ordered in [(1, True), (2, True), (2, False)]:
+            results = list(distinctiveness_many(
+                iter(graphs + [edges]), alpha=2, normalize=True,
+                n_jobs=n_jobs, chunksize=2, ordered=ordered))
+            if not ordered:
+                results = [r for i, r in sorted(results,
+                                                key=lambda x: x[0])]
+            assert len(results) == len(DCs)
+            for DC, result in zip(DCs, results):
+                if isinstance(DC, float):
+                    assert np.isnan(result)
+                    continue
+                assert DC.keys() == result.keys()
+                for k in DC:
+                    for n in DC[k]:
+                        assert almost_equal(DC[k][n], result[k][n])
+
+    def test_windows(self):
+        for G in [small_undir_G(), small_dir_G()]:
+            # Edges of G at times 0, 1, 2, ..., each repeated 4 time units
+            # later, plus a loop
+            edges = [(u, v, i, w) for i, (u, v, w)
+                     in enumerate(G.edges(data="weight"))]
+            edges += [(u, v, t + 4, w) for u, v, t, w in edges]
+            edges.append(("A", "A", 8, 1))
+            edges.sort(key=lambda e: e[2])
+            snapshots = list(distinctiveness_windows(
+                edges, window=6, step=2, alpha=2, directed=G.is_directed()))
+            ends = [end for end, _ in snapshots]
+            last = edges[-1][2]
+            assert ends == list(range(6, last + 2, 2)) and ends[-1] > last
+            for end, DC in snapshots:
+                H = nx.MultiDiGraph() if G.is_directed() else nx.MultiGraph()
+                H.add_weighted_edges_from(
+                    (u, v, w) for u, v, t, w in edges
+                    if end - 6 <= t < end and u != v)
+                if H.number_of_nodes() < 3:
+                    assert np.isnan(DC)
+                    continue
+                DCH = distinctiveness(H, alpha=2)
+                for k in DCH:
+                    assert DCH[k].keys() == DC[k].keys()
+                    for n in DCH[k]:
+                        assert almost_equal(DCH[k][n], DC[k][n])
+
 
 # Will say something in case of errors
 foo = TestDistinctiveness()
 foo.test_directed()
 foo.test_undirected()
+foo.test_vectorized()
+foo.test_from_edges()
+foo.test_preprocess()
+foo.test_preprocess_nocopy()
+foo.test_sweep()
+foo.test_nodeattribute()
+foo.test_edgeattribute()
+foo.test_incremental()
+foo.test_top_k()
+foo.test_approx()
+foo.test_output()
+foo.test_lazy()
+foo.test_from_file()
+foo.test_save_load()
+foo.test_cache()
+foo.test_alpha_sums()
+foo.test_profile_stages()
+foo.test_numba()
+foo.test_windows()
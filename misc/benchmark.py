@@ -0,0 +1,191 @@
+"""Benchmark of the public functions of distinctiveness.
+
+Runs every function on synthetic random graphs of increasing size and
+density, directed and undirected, with a single alpha or a list of five
+and with all or single measures. Wall time and peak memory (as traced by
+tracemalloc) are written as one JSON record per run, e.g.
+
+    python misc/benchmark.py --sizes 1000 5000 --out bench.jsonl
+
+With --baseline, the results are also compared with those of a previous
+run (e.g. of the last release), printing the ratio of times and memory.
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from distinctiveness.dc import (dc_edgeattribute, dc_nodeattribute,
+                                distinctiveness, distinctiveness_byattribute,
+                                g_preprocess)
+
+ALPHAS = {"scalar": 2, "list": [1, 2, 3, 4, 5]}
+MEASURES = {"all": ["D1", "D2", "D3", "D4", "D5"], "D1": ["D1"],
+            "D3": ["D3"]}
+
+
+def synthetic_graph(n, degree, directed, seed=0):
+
+    # Random graph with n nodes and about n * degree / 2 edges, integer
+    # weights between 1 and 10, a node attribute with 5 values and an edge
+    # attribute with 3 values
+    rng = np.random.default_rng(seed)
+    G = nx.gnm_random_graph(n, n * degree // 2, seed=seed, directed=directed)
+    weights = rng.integers(1, 11, G.number_of_edges())
+    layers = rng.integers(0, 3, G.number_of_edges())
+    for (u, v, data), w, layer in zip(G.edges(data=True), weights, layers):
+        data["weight"] = int(w)
+        data["layer"] = "L" + str(layer)
+    for node, group in zip(G.nodes, rng.integers(0, 5, n)):
+        G.nodes[node]["group"] = "G" + str(group)
+
+    return G
+
+
+def functions(engines):
+
+    # (name, parameters, callable of G, alpha and measures)
+    cases = [("g_preprocess", {},
+              lambda G, a, m: g_preprocess(G, alpha=a, measures=m,
+                                           copy=False))]
+    for engine in engines:
+        cases.append(("distinctiveness", {"engine": engine},
+                      lambda G, a, m, e=engine: distinctiveness(
+                          G, alpha=a, normalize=True, measures=m, engine=e)))
+    cases += [
+        ("distinctiveness_byattribute", {},
+         lambda G, a, m: distinctiveness_byattribute(G, "group", "G0",
+                                                     alpha=a, measures=m)),
+        ("dc_nodeattribute", {},
+         lambda G, a, m: dc_nodeattribute(G, "group", alpha=a, measures=m)),
+        ("dc_edgeattribute", {},
+         lambda G, a, m: dc_edgeattribute(G, "layer", alpha=a, measures=m)),
+    ]
+    return cases
+
+
+def measure(f, repeat):
+
+    # Best wall time of repeat runs, and peak memory of a separate run
+    # (tracing slows down the calculation)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    f()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return min(times), peak
+
+
+CASE = ["function", "engine", "nodes", "degree", "directed", "alpha",
+        "measures"]
+
+
+def compare(results, baseline):
+
+    # Ratios of time and memory to the baseline, for the cases in both
+    new = pd.read_json(results, lines=True)
+    old = pd.read_json(baseline, lines=True)
+    case = [c for c in CASE if c in new.columns and c in old.columns]
+    for df in [new, old]:
+        df[case] = df[case].fillna("")
+    merged = new.merge(old, on=case, suffixes=("", "_baseline"))
+    merged["time_ratio"] = merged["seconds"] / merged["seconds_baseline"]
+    merged["memory_ratio"] = (merged["peak_bytes"]
+                              / merged["peak_bytes_baseline"])
+    return merged[case + ["seconds", "time_ratio", "memory_ratio"]]
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1000, 5000, 20000])
+    parser.add_argument("--degrees", type=int, nargs="+", default=[10, 50],
+                        help="average degree of nodes")
+    parser.add_argument("--directed", choices=["yes", "no", "both"],
+                        default="both")
+    parser.add_argument("--alphas", choices=list(ALPHAS), nargs="+",
+                        default=list(ALPHAS))
+    parser.add_argument("--measures", choices=list(MEASURES), nargs="+",
+                        default=list(MEASURES))
+    parser.add_argument("--functions", nargs="+", default=None,
+                        help="names of the functions to run (default: all)")
+    parser.add_argument("--engines", nargs="+",
+                        default=["loop", "vectorized"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default=None,
+                        help="JSON lines file (default: standard output)")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON lines file of a previous run to compare")
+    args = parser.parse_args(argv)
+
+    directed = {"yes": [True], "no": [False],
+                "both": [False, True]}[args.directed]
+    cases = [c for c in functions(args.engines)
+             if args.functions is None or c[0] in args.functions]
+    environment = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "networkx": nx.__version__,
+        "machine": platform.machine(),
+    }
+
+    results = io.StringIO()
+    out = open(args.out, "w") if args.out else sys.stdout
+    try:
+        for n, degree, d in itertools.product(args.sizes, args.degrees,
+                                              directed):
+            G = synthetic_graph(n, degree, d)
+            for (name, params, f), a, m in itertools.product(
+                    cases, args.alphas, args.measures):
+                # Warnings printed by the functions are discarded
+                with contextlib.redirect_stdout(io.StringIO()):
+                    seconds, peak = measure(
+                        lambda: f(G, ALPHAS[a], MEASURES[m]), args.repeat)
+                record = {
+                    "function": name,
+                    **params,
+                    "nodes": n,
+                    "edges": G.number_of_edges(),
+                    "degree": degree,
+                    "directed": d,
+                    "alpha": a,
+                    "measures": m,
+                    "seconds": seconds,
+                    "peak_bytes": peak,
+                    **environment,
+                }
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                results.write(json.dumps(record) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.baseline:
+        results.seek(0)
+        with pd.option_context("display.max_rows", None,
+                               "display.max_columns", None,
+                               "display.width", 200):
+            print(compare(results, args.baseline), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()